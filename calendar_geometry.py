@@ -0,0 +1,65 @@
+"""Cached date arithmetic shared by the views and the scheduler.
+
+Dates and datetimes are immutable, so the same objects can be handed out to
+every caller instead of being rebuilt on each request.
+"""
+import calendar as calend
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+DAYS_IN_WEEK = 7
+
+# A day runs from start (midnight) up to but not including end (next midnight)
+DayWindow = namedtuple("DayWindow", ["date", "start", "end"])
+MonthLayout = namedtuple(
+    "MonthLayout",
+    [
+        "year",
+        "month",
+        "month_name",
+        # Day of the week the month starts on, Monday is 0
+        "first_day",
+        "num_days",
+        "days",
+        "start",
+        "end",
+        # Empty cells before the first day and after the last day in the grid
+        "leading_padding",
+        "trailing_padding",
+    ],
+)
+
+
+@lru_cache(maxsize=4096)
+def day_window(day: date) -> DayWindow:
+    start = datetime.combine(day, time(0, 0, 0))
+    end = start + timedelta(days=1)
+    return DayWindow(day, start, end)
+
+
+@lru_cache(maxsize=256)
+def month_layout(year: int, month: int) -> MonthLayout:
+    first_day, num_days = calend.monthrange(year, month)
+    days = tuple(day_window(date(year, month, day)) for day in range(1, num_days + 1))
+    # Always fill out the last week of the grid
+    trailing_padding = -(first_day + num_days) % DAYS_IN_WEEK
+    return MonthLayout(
+        year,
+        month,
+        calend.month_name[month],
+        first_day,
+        num_days,
+        days,
+        days[0].start,
+        days[-1].end,
+        first_day,
+        trailing_padding,
+    )
+
+
+# From https://stackoverflow.com/a/1060330
+def daterange(start_date: date, end_date: date):
+    """All dates from start_date up to but not including end_date"""
+    for n in range((end_date - start_date).days):
+        yield start_date + timedelta(n)
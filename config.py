@@ -11,3 +11,8 @@ class DebugConfig(Config):
 
 class ProductionConfig(Config):
     DEBUG = False
+
+
+class LoadTestConfig(Config):
+    DEBUG = False
+    SQLALCHEMY_DATABASE_URI = "sqlite:///loadtest.db"
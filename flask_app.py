@@ -1,8 +1,9 @@
-import calendar as calend
 from collections import namedtuple
-from datetime import datetime, time, timedelta
+from datetime import datetime, timedelta
 from flask import (
     Flask,
+    abort,
+    jsonify,
     render_template,
     request,
     redirect,
@@ -25,6 +26,8 @@ import hmac
 import hashlib
 import os
 import requests
+from calendar_geometry import daterange, day_window, month_layout
+from sqlalchemy.exc import IntegrityError
 from werkzeug.security import check_password_hash, generate_password_hash
 
 app = Flask(__name__)
@@ -45,6 +48,20 @@ USERNAME_MAX_LEN = 50
 WRONG_USERNAME_OR_PASSWORD = "Wrong username or password"
 DATE_FORMAT = "%Y-%m-%d"
 TIME_FORMAT = "%H:%M"
+CURSOR_FORMAT = "%Y-%m-%dT%H:%M:%S"
+AGENDA_PAGE_SIZE = 20
+AGENDA_MAX_PAGE_SIZE = 100
+CHANGES_PAGE_SIZE = 500
+
+# Kinds of schedule changes recorded in the change log
+HOMEWORK_ADDED = "homework_added"
+HOMEWORK_DELETED = "homework_deleted"
+CHUNK_ADDED = "chunk_added"
+CHUNK_DELETED = "chunk_deleted"
+
+# The scheduler fits chunks between midnight and this time each day
+LAST_CHUNK_END = timedelta(hours=23)
+SCHEDULABLE_MINUTES = int(LAST_CHUNK_END.total_seconds() // 60)
 
 
 class Homework(db.Model):
@@ -81,7 +98,14 @@ class Activity(db.Model):
 
 class Chunk(db.Model):
     __tablename__ = "chunks"
+    # Keyset pagination walks a user's chunks in (start_time, id) order
+    __table_args__ = (
+        db.Index("ix_chunks_user_id_start_time_id", "user_id", "start_time", "id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
+    # Same as the homework's, so a user's chunks can be found without a join
+    user_id = db.Column(db.Integer)
     homework_id = db.Column(db.Integer)
     start_time = db.Column(db.DateTime)
     end_time = db.Column(db.DateTime)
@@ -91,6 +115,44 @@ class Chunk(db.Model):
         return f"Chunk(actId={self.homework_id}, start={self.start_time}, end={self.end_time})"
 
 
+class ScheduleChange(db.Model):
+    """Append-only log of changes to a user's schedule. seq comes from the
+    user's change_seq counter, see log_change"""
+
+    __tablename__ = "schedule_changes"
+    __table_args__ = (
+        db.Index("ix_schedule_changes_user_id_seq", "user_id", "seq", unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer)
+    seq = db.Column(db.Integer)
+    kind = db.Column(db.String(20))
+    homework_id = db.Column(db.Integer)
+    # Only set for chunk changes
+    chunk_id = db.Column(db.Integer)
+    start_time = db.Column(db.DateTime)
+    end_time = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+
+
+class CapacityDay(db.Model):
+    """How many minutes of a user's day are taken up by chunks. busy_through
+    is a running total up to and including this day, so the free time between
+    any two days only takes two lookups"""
+
+    __tablename__ = "capacity_days"
+    __table_args__ = (
+        db.Index("ix_capacity_days_user_id_day", "user_id", "day", unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer)
+    day = db.Column(db.Date)
+    busy_minutes = db.Column(db.Integer, default=0)
+    busy_through = db.Column(db.Integer, default=0)
+
+
 class User(db.Model, UserMixin):
     __tablename__ = "users"
 
@@ -98,6 +160,8 @@ class User(db.Model, UserMixin):
     email = db.Column(db.String(4096))
     username = db.Column(db.String(USERNAME_MAX_LEN))
     password_hash = db.Column(db.String(4096))
+    # Sequence number of the user's latest schedule change
+    change_seq = db.Column(db.Integer, default=0, server_default="0")
     # An homework chunk can be no shorter than this (minutes)
     break_time = 15
     # How long to wait between homeworks
@@ -111,6 +175,177 @@ class User(db.Model, UserMixin):
 
 
 ChunkWithHomework = namedtuple("ChunkWithHomework", ["homework", "chunk"])
+AgendaPage = namedtuple("AgendaPage", ["chunkWithActs", "next_cursor"])
+
+
+def encode_cursor(chunk: Chunk) -> str:
+    return f"{chunk.start_time.strftime(CURSOR_FORMAT)}_{chunk.id}"
+
+
+def decode_cursor(cursor: str):
+    """Turn a cursor from encode_cursor back into (start_time, id).
+    Raises ValueError if the cursor is malformed"""
+    start_time, chunk_id = cursor.rsplit("_", 1)
+    return datetime.strptime(start_time, CURSOR_FORMAT), int(chunk_id)
+
+
+def agenda_page(
+    user_id: int,
+    start: datetime = None,
+    end: datetime = None,
+    cursor: str = None,
+    limit: int = AGENDA_PAGE_SIZE,
+) -> AgendaPage:
+    """Get the next `limit` chunks for a user in (start_time, id) order,
+    optionally only those inside the [start, end) window.
+    Descriptions aren't loaded, use homework_description for those"""
+    query = (
+        db.session.query(Homework, Chunk)
+        .join(Chunk, Chunk.homework_id == Homework.id)
+        .filter(Chunk.user_id == user_id)
+        .options(db.defer(Homework.desc))
+    )
+    if start is not None:
+        query = query.filter(Chunk.start_time >= start)
+    if end is not None:
+        query = query.filter(Chunk.end_time <= end)
+    if cursor is not None:
+        after_time, after_id = decode_cursor(cursor)
+        query = query.filter(
+            db.or_(
+                Chunk.start_time > after_time,
+                db.and_(Chunk.start_time == after_time, Chunk.id > after_id),
+            )
+        )
+    # Fetch one extra row to know if there's another page
+    rows = query.order_by(Chunk.start_time, Chunk.id).limit(limit + 1).all()
+    chunkWithActs = [ChunkWithHomework(homework, chunk) for homework, chunk in rows]
+    next_cursor = None
+    if len(chunkWithActs) > limit:
+        chunkWithActs = chunkWithActs[:limit]
+        next_cursor = encode_cursor(chunkWithActs[-1].chunk)
+    return AgendaPage(chunkWithActs, next_cursor)
+
+
+def log_change(user_id: int, kind: str, homework_id: int, chunk: Chunk = None):
+    """Record a schedule change. It's added to the session, so it gets
+    committed along with the change itself.
+
+    Bumping the user's counter locks their row until the commit, so a user's
+    changes are committed in seq order and /api/changes never skips one"""
+    User.query.filter_by(id=user_id).update(
+        {User.change_seq: db.func.coalesce(User.change_seq, 0) + 1},
+        synchronize_session=False,
+    )
+    seq = db.session.query(User.change_seq).filter_by(id=user_id).scalar()
+    change = ScheduleChange(
+        user_id=user_id, seq=seq, kind=kind, homework_id=homework_id
+    )
+    if chunk is not None:
+        change.chunk_id = chunk.id
+        change.start_time = chunk.start_time
+        change.end_time = chunk.end_time
+    db.session.add(change)
+
+
+def delete_chunks(user_id: int, homework_id: int):
+    """Delete all of a homework's chunks, logging each one"""
+    chunks = Chunk.query.filter_by(homework_id=homework_id)
+    for chunk in chunks:
+        log_change(user_id, CHUNK_DELETED, homework_id, chunk)
+        update_capacity(user_id, chunk.start_time.date(), -chunk_minutes(chunk))
+    chunks.delete()
+
+
+def chunk_minutes(chunk: Chunk) -> int:
+    return int((chunk.end_time - chunk.start_time).total_seconds() // 60)
+
+
+def busy_before(user_id: int, day: datetime.date, for_update: bool = False) -> int:
+    """Total busy minutes on all days before `day`"""
+    query = db.session.query(CapacityDay.busy_through).filter(
+        CapacityDay.user_id == user_id, CapacityDay.day < day
+    )
+    if for_update:
+        query = query.with_for_update()
+    busy_through = query.order_by(CapacityDay.day.desc()).limit(1).scalar()
+    return busy_through or 0
+
+
+def update_capacity(user_id: int, day: datetime.date, minutes: int):
+    """Mark `minutes` more of a day as busy, negative to free them up.
+    All the arithmetic happens in SQL so concurrent requests don't lose updates"""
+    exists = (
+        db.session.query(CapacityDay.id).filter_by(user_id=user_id, day=day).first()
+    )
+    if exists is None:
+        try:
+            with db.session.begin_nested():
+                # Lock the day before so its running total can't change under us
+                db.session.add(
+                    CapacityDay(
+                        user_id=user_id,
+                        day=day,
+                        busy_minutes=0,
+                        busy_through=busy_before(user_id, day, for_update=True),
+                    )
+                )
+        except IntegrityError:
+            # Another request added the day first, update theirs instead
+            pass
+    CapacityDay.query.filter_by(user_id=user_id, day=day).update(
+        {CapacityDay.busy_minutes: CapacityDay.busy_minutes + minutes},
+        synchronize_session=False,
+    )
+    CapacityDay.query.filter(
+        CapacityDay.user_id == user_id, CapacityDay.day >= day
+    ).update(
+        {CapacityDay.busy_through: CapacityDay.busy_through + minutes},
+        synchronize_session=False,
+    )
+
+
+def rebuild_capacity(user_id: int):
+    """Recompute a user's capacity index from their chunks"""
+    CapacityDay.query.filter_by(user_id=user_id).delete()
+    busy = {}
+    for chunk in Chunk.query.filter_by(user_id=user_id):
+        day = chunk.start_time.date()
+        busy[day] = busy.get(day, 0) + chunk_minutes(chunk)
+    busy_through = 0
+    for day in sorted(busy):
+        busy_through += busy[day]
+        db.session.add(
+            CapacityDay(
+                user_id=user_id,
+                day=day,
+                busy_minutes=busy[day],
+                busy_through=busy_through,
+            )
+        )
+
+
+def free_minutes(user_id: int, start_date: datetime.date, end_date: datetime.date) -> int:
+    """Free minutes from start_date up to but not including end_date"""
+    days = max(0, (end_date - start_date).days)
+    busy = busy_before(user_id, end_date) - busy_before(user_id, start_date)
+    return days * SCHEDULABLE_MINUTES - max(0, busy)
+
+
+def can_fit(user_id: int, start_date, due_date, time_needed: int, max_time: int) -> bool:
+    """Whether there could be enough time to schedule homework before it's due.
+    schedule_homework only puts chunks in the gaps between existing ones, so
+    busy minutes never overlap and False means it definitely won't manage it"""
+    days = max(0, (due_date - start_date).days)
+    available = min(free_minutes(user_id, start_date, due_date), days * max_time)
+    return time_needed <= available
+
+
+def request_page_args():
+    """Get the cursor and page size from the request's query string"""
+    cursor = request.args.get("cursor") or None
+    limit = request.args.get("limit", AGENDA_PAGE_SIZE, type=int)
+    return cursor, max(1, min(limit, AGENDA_MAX_PAGE_SIZE))
 
 
 def is_valid_signature(x_hub_signature, data, private_key):
@@ -225,12 +460,132 @@ def favicon():
 def whats_today():
     if not current_user.is_authenticated:
         return redirect(url_for("index"))
-    homeworks = Homework.query.filter_by(user_id=current_user.id)
-    chunkWithActs = []
-    for homework in homeworks:
-        for chunk in Chunk.query.filter_by(homework_id=homework.id):
-            chunkWithActs.append((homework, chunk))
-    return render_template("whats_today.html", chunkWithActs=chunkWithActs)
+    cursor, limit = request_page_args()
+    start_of_today = day_window(datetime.now().date()).start
+    try:
+        page = agenda_page(current_user.id, start=start_of_today, cursor=cursor, limit=limit)
+    except ValueError:
+        flash("Invalid page cursor", "alert")
+        page = agenda_page(current_user.id, start=start_of_today, limit=limit)
+    return render_template(
+        "whats_today.html",
+        chunkWithActs=page.chunkWithActs,
+        next_cursor=page.next_cursor,
+    )
+
+
+@app.route("/api/agenda", methods=["GET"])
+@login_required
+def api_agenda():
+    """Page through the user's upcoming chunks, `cursor` comes from the
+    previous page's `next_cursor`. `start` (YYYY-MM-DD, defaults to today)
+    and `end` limit the window"""
+    cursor, limit = request_page_args()
+    try:
+        start = request.args.get("start")
+        start = datetime.strptime(start, DATE_FORMAT) if start else datetime.now()
+        start = day_window(start.date()).start
+        end = request.args.get("end")
+        end = day_window(datetime.strptime(end, DATE_FORMAT).date()).end if end else None
+        page = agenda_page(current_user.id, start=start, end=end, cursor=cursor, limit=limit)
+    except ValueError:
+        abort(400)
+    return jsonify(
+        chunks=[
+            {
+                "id": chunk.id,
+                "homework_id": homework.id,
+                "name": homework.name,
+                "due": homework.due.strftime(f"{DATE_FORMAT} {TIME_FORMAT}"),
+                "start_time": chunk.start_time.strftime(CURSOR_FORMAT),
+                "end_time": chunk.end_time.strftime(CURSOR_FORMAT),
+                "description_url": url_for("homework_description", homework_id=homework.id),
+            }
+            for homework, chunk in page.chunkWithActs
+        ],
+        next_cursor=page.next_cursor,
+    )
+
+
+@app.route("/api/homework/<int:homework_id>/description", methods=["GET"])
+@login_required
+def homework_description(homework_id):
+    """Descriptions can be long, so pages only fetch them when expanded"""
+    homework = (
+        db.session.query(Homework.id, Homework.desc)
+        .filter_by(id=homework_id, user_id=current_user.id)
+        .first()
+    )
+    if homework is None:
+        abort(404)
+    return jsonify(id=homework.id, desc=homework.desc or "")
+
+
+@app.route("/api/changes", methods=["GET"])
+@login_required
+def api_changes():
+    """Get the user's schedule changes after sequence number `since`.
+    Pass the returned `latest` as `since` to get the next batch"""
+    since = request.args.get("since", 0, type=int)
+    changes = (
+        ScheduleChange.query.filter(
+            ScheduleChange.user_id == current_user.id,
+            ScheduleChange.seq > since,
+        )
+        .order_by(ScheduleChange.seq)
+        .limit(CHANGES_PAGE_SIZE + 1)
+        .all()
+    )
+    has_more = len(changes) > CHANGES_PAGE_SIZE
+    changes = changes[:CHANGES_PAGE_SIZE]
+    return jsonify(
+        changes=[
+            {
+                "seq": change.seq,
+                "kind": change.kind,
+                "homework_id": change.homework_id,
+                "chunk_id": change.chunk_id,
+                "start_time": change.start_time.strftime(CURSOR_FORMAT)
+                if change.start_time
+                else None,
+                "end_time": change.end_time.strftime(CURSOR_FORMAT)
+                if change.end_time
+                else None,
+            }
+            for change in changes
+        ],
+        latest=changes[-1].seq if changes else since,
+        has_more=has_more,
+    )
+
+
+@app.route("/api/capacity", methods=["GET"])
+@login_required
+def api_capacity():
+    """Check if homework would fit before it's due, for the add homework form.
+    Takes `start_date` and `due` (YYYY-MM-DD), `time` and `max_time` (minutes)"""
+    try:
+        start_date = request.args.get("start_date") or datetime.now().strftime(
+            DATE_FORMAT
+        )
+        start_date = datetime.strptime(start_date, DATE_FORMAT).date()
+        due = datetime.strptime(request.args["due"], DATE_FORMAT).date()
+        time_needed = int(request.args["time"])
+        max_time = int(request.args.get("max_time") or time_needed)
+    except (KeyError, ValueError):
+        abort(400)
+    return jsonify(
+        free_minutes=free_minutes(current_user.id, start_date, due),
+        feasible=can_fit(current_user.id, start_date, due, time_needed, max_time),
+    )
+
+
+@app.cli.command("rebuild-capacity")
+def rebuild_capacity_command():
+    """Rebuild every user's capacity index from their chunks"""
+    for user in User.query:
+        rebuild_capacity(user.id)
+    db.session.commit()
 
 
 @app.route("/calendar", methods=["GET"])
@@ -241,26 +596,25 @@ def calendar():
     year = int(request.args.get("year", datetime.now().year))
     month = int(request.args.get("month", datetime.now().month))
     day = request.args.get("day")
-    month_name = calend.month_name[month]
+    layout = month_layout(year, month)
+    month_name = layout.month_name
 
     if day is None:  # Month view
-
-        # Get which day of the week the first day of the month is
-        # to offset the start of the calendar
-        [first_day, num_days] = calend.monthrange(year, month)
-        days = []
-        for day in range(1, num_days + 1):
-            today = []
-            start_of_day = datetime(year, month, day)
-            end_of_day = start_of_day + timedelta(days=1)
-            chunks = Chunk.query.filter(
-                Chunk.start_time >= start_of_day,
-                Chunk.end_time <= end_of_day,
+        # Get the whole month at once and sort the chunks into days
+        days = [[] for _ in layout.days]
+        chunkWithActs = (
+            db.session.query(Homework, Chunk)
+            .join(Chunk, Chunk.homework_id == Homework.id)
+            .filter(
+                Chunk.user_id == current_user.id,
+                Chunk.start_time >= layout.start,
+                Chunk.end_time <= layout.end,
             )
-            for chunk in chunks:
-                homework = Homework.query.get(chunk.homework_id)
-                today.append((homework, chunk))
-            days.append(today)
+            .options(db.defer(Homework.desc))
+            .order_by(Chunk.start_time, Chunk.id)
+        )
+        for homework, chunk in chunkWithActs:
+            days[chunk.start_time.day - 1].append(ChunkWithHomework(homework, chunk))
 
         return render_template(
             "calendar.html",
@@ -272,7 +626,8 @@ def calendar():
             prev_month=12 if month == 1 else month - 1,
             next_month_year=year + 1 if month == 12 else year,
             next_month=1 if month == 12 else month + 1,
-            first_day=first_day,
+            leading_padding=layout.leading_padding,
+            trailing_padding=layout.trailing_padding,
             days=days,
             today=datetime.today().day
             if datetime.today().year == year and datetime.today().month == month
@@ -280,16 +635,16 @@ def calendar():
         )
     else:  # Day view
         day = int(day)
-        start_of_day = datetime(year, month, day)
-        end_of_day = start_of_day + timedelta(days=1)
-        chunks = Chunk.query.filter(
-            Chunk.start_time >= start_of_day,
-            Chunk.end_time <= end_of_day,
-        )
-        chunksWithActs = []
-        for chunk in chunks:
-            homework = Homework.query.get(chunk.homework_id)
-            chunksWithActs.append((homework, chunk))
+        if not 1 <= day <= layout.num_days:
+            abort(404)
+        window = layout.days[day - 1]
+        start_of_day, end_of_day = window.start, window.end
+        cursor, limit = request_page_args()
+        try:
+            page = agenda_page(current_user.id, start_of_day, end_of_day, cursor, limit)
+        except ValueError:
+            flash("Invalid page cursor", "alert")
+            page = agenda_page(current_user.id, start_of_day, end_of_day, limit=limit)
         return render_template(
             "calendar.html",
             month_view=False,
@@ -297,69 +652,76 @@ def calendar():
             month=month,
             day=day,
             month_name=month_name,
-            chunksWithActs=chunksWithActs,
+            chunksWithActs=page.chunkWithActs,
+            next_cursor=page.next_cursor,
         )
 
 
-# From https://stackoverflow.com/a/1060330
-def daterange(start_date, end_date):
-    for n in range(int((end_date - start_date).days)):
-        yield start_date + timedelta(n)
-
 def reschedule_homework(start_date: datetime.date):
     homeworks = Homework.query.filter(Homework.due.date() >= start_date)
     for homework in homeworks:
-        Chunk.query.filter_by(homework_id=homework.id).delete()
+        delete_chunks(homework.user_id, homework.id)
     db.session.commit()
     for homework in homeworks:
         schedule_homework(homework)
 
-def schedule_homework(homework: Homework):
+def schedule_homework(homework: Homework) -> int:
+    """Fit chunks of homework into the gaps in the user's days, returns
+    how many minutes couldn't be scheduled"""
     time_needed = homework.time_needed
     max_time = homework.max_time
-    curr_date = homework.start_date
-    while time_needed > 0 and curr_date < homework.due.date():
-        day_start = datetime.combine(curr_date, time(0, 0, 0))
-        day_end = day_start + timedelta(days=1)
-        chunks = Chunk.query.filter(Chunk.start_time >= day_start, Chunk.end_time <= day_end).order_by(
-            Chunk.start_time
-        )
+    for curr_date in daterange(homework.start_date, homework.due.date()):
+        if time_needed <= 0:
+            break
+        window = day_window(curr_date)
+        # Only this user's chunks are busy time, same as the capacity index
+        chunks = Chunk.query.filter(
+            Chunk.user_id == homework.user_id,
+            Chunk.start_time >= window.start,
+            Chunk.end_time <= window.end,
+        ).order_by(Chunk.start_time)
         # Start at midnight
-        prev_time = day_start
+        prev_time = window.start
         # Add a dummy chunk for the end of the day
+        end_of_day = window.start + LAST_CHUNK_END
         chunks = list(chunks) + [
             Chunk(
                 homework_id=homework.id,
-                start_time=datetime.combine(curr_date, time(23, 0, 0)),
-                end_time=datetime.combine(curr_date, time(23, 0, 0)),
+                start_time=end_of_day,
+                end_time=end_of_day,
             )
         ]
         for chunk in chunks:
+            # The gap between the last chunk and this one, so new chunks
+            # never overlap existing ones
             time_diff = (
-                chunk.end_time - prev_time
+                chunk.start_time - prev_time
             ).total_seconds() // 60 - 2 * current_user.break_time
             # raise Exception(f"start:{start},end:{end},timediff:{time_diff}")
-            if (
-                time_diff >= current_user.chunk_time
-                or time_needed < current_user.chunk_time
-            ):
+            # Chunks can only be shorter than chunk_time to finish the homework
+            if time_diff >= min(current_user.chunk_time, time_needed):
                 chunk_time = min(time_needed, min(time_diff, max_time))
                 start_time = prev_time + timedelta(minutes=current_user.break_time)
                 end_time = start_time + timedelta(minutes=chunk_time)
                 new_chunk = Chunk(
+                    user_id=homework.user_id,
                     homework_id=homework.id,
                     start_time=start_time,
                     end_time=end_time,
                 )
                 time_needed -= chunk_time
                 db.session.add(new_chunk)
+                # Flush so the chunk has an id for the change log
+                db.session.flush()
+                log_change(homework.user_id, CHUNK_ADDED, homework.id, new_chunk)
+                update_capacity(homework.user_id, curr_date, chunk_minutes(new_chunk))
                 break
-            prev_time = chunk.end_time
+            prev_time = max(prev_time, chunk.end_time)
             if time_needed <= 0:
                 break
-        curr_date += timedelta(days=1)
         # raise Exception(f"{time_needed}, {curr_date}")
     db.session.commit()
+    return max(0, int(time_needed))
 
 
 @app.route("/add_homework", methods=["GET", "POST"])
@@ -373,24 +735,34 @@ def add_homework():
         name = request.form["name"][:HOMEWORK_NAME_LEN]
         desc = request.form.get("description", "")
         due = request.form.get("due")
-        start_date = request.form.get(
-            "start_date", datetime.now().strftime(DATE_FORMAT)
+        start_date = request.form.get("start_date") or datetime.now().strftime(
+            DATE_FORMAT
         )
-        time_needed = request.form.get("time")
-        max_time = request.form.get("max_time", time)
+        time_needed = int(request.form.get("time"))
+        max_time = int(request.form.get("max_time") or time_needed)
         start_date = datetime.strptime(start_date, DATE_FORMAT).date()
+        due = datetime.strptime(due, f"{DATE_FORMAT}T{TIME_FORMAT}")
         homework = Homework(
             user_id=current_user.id,
             name=name,
             desc=desc,
-            due=datetime.strptime(due, f"{DATE_FORMAT}T{TIME_FORMAT}").strftime(f"{DATE_FORMAT} {TIME_FORMAT}"),
-            start_date=start_date.strftime(DATE_FORMAT),
+            due=due,
+            start_date=start_date,
             time_needed=time_needed,
             max_time=max_time,
         )
         db.session.add(homework)
+        db.session.flush()
+        log_change(current_user.id, HOMEWORK_ADDED, homework.id)
         db.session.commit()
-        schedule_homework(homework)
+        # Still plan as much as fits, the user can fix the rest
+        time_left = schedule_homework(homework)
+        if time_left > 0:
+            flash(
+                "There isn't enough free time to finish this before it's due, "
+                f"{time_left} minutes couldn't be scheduled",
+                "alert",
+            )
         return redirect(url_for("whats_today"))
 
 
@@ -465,8 +837,13 @@ def edit_homework(name, desc, due):
 def delete_homework():
     homework_id = request.form.get("homeworkId")
     if homework_id is not None:
-        Homework.query.filter_by(id=homework_id, user_id=current_user.id).delete()
-        Chunk.query.filter_by(homework_id=homework_id).delete()
+        deleted = Homework.query.filter_by(
+            id=homework_id, user_id=current_user.id
+        ).delete()
+        # Don't touch chunks of homework belonging to someone else
+        if deleted:
+            delete_chunks(current_user.id, homework_id)
+            log_change(current_user.id, HOMEWORK_DELETED, homework_id)
         db.session.commit()
     else:
         flash("Homework id not given when deleting", "alert")
@@ -0,0 +1,411 @@
+"""Load test the app with a realistic mix of traffic from many concurrent clients.
+
+Seeds a database with synthetic users and homework, starts the app in
+--workers separate processes (or uses --url to target one that's already
+running against the same database) and reports latency percentiles and
+throughput for each route.
+
+    python loadtest.py --clients 20 --workers 4 --duration 30
+    python loadtest.py --database-uri mysql+mysqlconnector://... --url http://localhost:8000
+"""
+import argparse
+import logging
+import math
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time as timer
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+from urllib.parse import urlparse
+
+import requests
+from werkzeug.serving import make_server
+
+import flask_app
+from flask_app import (
+    AGENDA_MAX_PAGE_SIZE,
+    DATE_FORMAT,
+    TIME_FORMAT,
+    Chunk,
+    Homework,
+    User,
+    app,
+    db,
+)
+
+LOADTEST_PASSWORD = "loadtest"
+DEFAULT_MIX = "calendar_month=3,calendar_day=3,whats_today=5,add_homework=1,delete_homework=1"
+
+# Where each route should redirect to, routes not listed should return 200
+EXPECTED_REDIRECTS = {
+    "login": "/index",
+    "add_homework": "/whats_today",
+    "delete_homework": "/whats_today",
+}
+
+Result = namedtuple("Result", ["route", "latency", "ok"])
+# Clients logged in as the same user split its homework between them, each
+# only deletes homework whose id % count == index
+Share = namedtuple("Share", ["index", "count"])
+
+
+def seed(num_users: int, homeworks_per_user: int, rng: random.Random):
+    """Create fresh synthetic users, each with homework spread over the
+    current month. Returns a list of (username, [homework ids])"""
+    db.drop_all()
+    db.create_all()
+    password_hash = flask_app.generate_password_hash(LOADTEST_PASSWORD)
+    today = datetime.now().date()
+    users = []
+    for i in range(num_users):
+        user = User(username=f"loadtest{i}", password_hash=password_hash)
+        db.session.add(user)
+        db.session.flush()
+        homework_ids = []
+        for j in range(homeworks_per_user):
+            start_date = today + timedelta(days=rng.randint(-14, 14))
+            homework = Homework(
+                user_id=user.id,
+                name=f"Homework {j}",
+                desc="Lorem ipsum dolor sit amet. " * rng.randint(1, 40),
+                due=datetime.combine(start_date + timedelta(days=7), time(23, 0)),
+                start_date=start_date,
+                time_needed=rng.randint(30, 300),
+                max_time=60,
+            )
+            db.session.add(homework)
+            db.session.flush()
+            homework_ids.append(homework.id)
+            for day in range(rng.randint(1, 5)):
+                start_time = datetime.combine(
+                    start_date + timedelta(days=day), time(rng.randint(8, 20))
+                )
+                db.session.add(
+                    Chunk(
+                        user_id=user.id,
+                        homework_id=homework.id,
+                        start_time=start_time,
+                        end_time=start_time + timedelta(minutes=rng.randint(15, 60)),
+                    )
+                )
+        db.session.flush()
+        flask_app.rebuild_capacity(user.id)
+        users.append((user.username, homework_ids))
+    db.session.commit()
+    return users
+
+
+def parse_mix(mix: str):
+    """Turn "route=weight,..." into a dict"""
+    weights = {}
+    for part in mix.split(","):
+        route, weight = part.split("=")
+        if route not in ROUTES:
+            raise argparse.ArgumentTypeError(f"Unknown route {route}")
+        weights[route] = int(weight)
+    return weights
+
+
+def is_expected(route, response):
+    """Whether the route did what it should. Redirects aren't followed, so
+    a GET that bounces to the login page counts as an error"""
+    expected = EXPECTED_REDIRECTS.get(route)
+    if expected is None:
+        return response.status_code == 200
+    return (
+        response.status_code == 302
+        and urlparse(response.headers.get("Location", "")).path == expected
+    )
+
+
+def login(base_url, username):
+    """Get a session logged in as `username`, or None if logging in failed"""
+    session = requests.Session()
+    response = session.post(
+        f"{base_url}/login",
+        data={"username": username, "password": LOADTEST_PASSWORD},
+        allow_redirects=False,
+    )
+    return session if is_expected("login", response) else None
+
+
+def owns(homework_id, share):
+    return homework_id % share.count == share.index
+
+
+def pick_homework(session, base_url, homework_ids, share):
+    """Get the id of some homework to delete, or None if there isn't any"""
+    if homework_ids:
+        return homework_ids.pop()
+    # Seeded homework's all gone, delete one that's been added since
+    agenda = session.get(
+        f"{base_url}/api/agenda", params={"limit": AGENDA_MAX_PAGE_SIZE}
+    ).json()
+    for chunk in agenda["chunks"]:
+        if owns(chunk["homework_id"], share):
+            return chunk["homework_id"]
+    return None
+
+
+def calendar_month(session, base_url, rng):
+    now = datetime.now()
+    month = rng.randint(1, 12)
+    return session.get(
+        f"{base_url}/calendar",
+        params={"year": now.year, "month": month},
+        allow_redirects=False,
+    )
+
+
+def calendar_day(session, base_url, rng):
+    day = datetime.now().date() + timedelta(days=rng.randint(-14, 14))
+    return session.get(
+        f"{base_url}/calendar",
+        params={"year": day.year, "month": day.month, "day": day.day},
+        allow_redirects=False,
+    )
+
+
+def whats_today(session, base_url, rng):
+    return session.get(f"{base_url}/whats_today", allow_redirects=False)
+
+
+def add_homework(session, base_url, rng):
+    now = datetime.now()
+    return session.post(
+        f"{base_url}/add_homework",
+        data={
+            "name": "Load test homework",
+            "description": "Added by the load test",
+            "due": (now + timedelta(days=rng.randint(1, 14))).strftime(
+                f"{DATE_FORMAT}T{TIME_FORMAT}"
+            ),
+            "start_date": now.strftime(DATE_FORMAT),
+            "time": rng.randint(30, 300),
+            "max_time": 60,
+        },
+        allow_redirects=False,
+    )
+
+
+def delete_homework(session, base_url, rng, homework_id):
+    return session.post(
+        f"{base_url}/delete_homework",
+        data={"homeworkId": homework_id},
+        allow_redirects=False,
+    )
+
+
+ROUTES = {
+    "calendar_month": calendar_month,
+    "calendar_day": calendar_day,
+    "whats_today": whats_today,
+    "add_homework": add_homework,
+    "delete_homework": delete_homework,
+}
+
+
+def run_client(
+    base_url, session, homework_ids, share, weights, deadline, seed, results
+):
+    """Send requests with a logged in session until `deadline`"""
+    rng = random.Random(seed)
+    routes = list(weights)
+    route_weights = [weights[route] for route in routes]
+    homework_ids = [homework_id for homework_id in homework_ids if owns(homework_id, share)]
+    while timer.monotonic() < deadline:
+        route = rng.choices(routes, route_weights)[0]
+        args = ()
+        if route == "delete_homework":
+            # Finding something to delete isn't part of the timed request
+            try:
+                homework_id = pick_homework(session, base_url, homework_ids, share)
+            except (requests.RequestException, ValueError):
+                homework_id = None
+            if homework_id is None:
+                continue
+            args = (homework_id,)
+        start = timer.perf_counter()
+        try:
+            response = ROUTES[route](session, base_url, rng, *args)
+            ok = is_expected(route, response)
+        except requests.RequestException:
+            ok = False
+        results.append(Result(route, timer.perf_counter() - start, ok))
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def report(results, elapsed):
+    by_route = defaultdict(list)
+    for result in results:
+        by_route[result.route].append(result)
+    by_route["TOTAL"] = results
+
+    print(
+        f"{'route':<16}{'requests':>10}{'errors':>8}{'req/s':>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for route, route_results in by_route.items():
+        if not route_results:
+            continue
+        latencies = sorted(result.latency * 1000 for result in route_results)
+        errors = sum(1 for result in route_results if not result.ok)
+        print(
+            f"{route:<16}{len(route_results):>10}{errors:>8}"
+            f"{len(route_results) / elapsed:>10.1f}"
+            f"{percentile(latencies, 50):>10.1f}"
+            f"{percentile(latencies, 95):>10.1f}"
+            f"{percentile(latencies, 99):>10.1f}"
+        )
+
+
+def configure_app(database_uri):
+    app.config.from_object("config.LoadTestConfig")
+    if database_uri:
+        app.config["SQLALCHEMY_DATABASE_URI"] = database_uri
+    # Don't drown the report in request logs
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+
+def start_workers(port, workers, database_uri):
+    """Serve the app from `workers` processes sharing one listening socket,
+    so the clients don't compete with the server for this process's GIL"""
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(("127.0.0.1", port))
+    listener.listen(128)
+    fd = listener.fileno()
+    command = [sys.executable, __file__, "--serve-fd", str(fd)]
+    if database_uri:
+        command += ["--database-uri", database_uri]
+    processes = [
+        subprocess.Popen(command, pass_fds=(fd,)) for _ in range(workers)
+    ]
+    # The workers have their own copies of the socket
+    listener.close()
+    return processes
+
+
+def serve(fd, database_uri):
+    """Run one worker on an already listening socket"""
+    configure_app(database_uri)
+    make_server("127.0.0.1", 0, app, threaded=True, fd=fd).serve_forever()
+
+
+def stop_servers(server, processes):
+    if server is not None:
+        server.shutdown()
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--clients", type=int, default=10, help="Concurrent clients")
+    parser.add_argument("--users", type=int, default=10, help="Synthetic users to seed")
+    parser.add_argument("--homeworks", type=int, default=30, help="Homeworks per user")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds to run for")
+    parser.add_argument(
+        "--mix", type=parse_mix, default=DEFAULT_MIX, help="route=weight,..."
+    )
+    parser.add_argument(
+        "--database-uri",
+        help="Database to seed, defaults to SQLite. All its tables are dropped "
+        "first, so never point this at production. Should be the one --url uses",
+    )
+    parser.add_argument(
+        "--url", help="Use an already running app instead of starting one"
+    )
+    parser.add_argument("--port", type=int, default=5050)
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Server processes to start"
+    )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Serve from a thread in this process instead of --workers "
+        "processes. The clients share its GIL, so latencies will be worse",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--serve-fd", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_fd is not None:
+        serve(args.serve_fd, args.database_uri)
+        return
+
+    configure_app(args.database_uri)
+
+    rng = random.Random(args.seed)
+    with app.app_context():
+        users = seed(args.users, args.homeworks, rng)
+    print(f"Seeded {len(users)} users with {args.homeworks} homeworks each")
+
+    server = None
+    processes = []
+    base_url = args.url
+    if base_url is None:
+        if args.in_process:
+            server = make_server("127.0.0.1", args.port, app, threaded=True)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        else:
+            processes = start_workers(args.port, args.workers, args.database_uri)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    sessions = []
+    for i in range(args.clients):
+        username = users[i % len(users)][0]
+        session = login(base_url, username)
+        if session is None:
+            stop_servers(server, processes)
+            raise SystemExit(
+                f"Couldn't log in as {username} at {base_url}. "
+                "Does --database-uri match the database the app uses?"
+            )
+        sessions.append(session)
+
+    # list.append is atomic, so clients can share one list
+    results = []
+    deadline = timer.monotonic() + args.duration
+    clients = [
+        threading.Thread(
+            target=run_client,
+            args=(
+                base_url,
+                sessions[i],
+                users[i % len(users)][1],
+                Share(
+                    i // len(users),
+                    len(range(i % len(users), args.clients, len(users))),
+                ),
+                args.mix,
+                deadline,
+                rng.random(),
+                results,
+            ),
+        )
+        for i in range(args.clients)
+    ]
+    start = timer.monotonic()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = timer.monotonic() - start
+
+    stop_servers(server, processes)
+    report(results, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -30,3 +30,16 @@ function postRequest(url, data) {
         body: JSON.stringify(data)
     })
 }
+
+/** Fill in a <details> element's description the first time it's opened */
+function loadDescription(details, url) {
+    if (!details.open || details.dataset.loaded) {
+        return;
+    }
+    details.dataset.loaded = "true";
+    fetch(url)
+        .then(response => response.json())
+        .then(homework => {
+            details.querySelector(".description").textContent = homework.desc;
+        })
+}